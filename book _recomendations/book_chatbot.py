@@ -1,9 +1,15 @@
 import os
+import json
 import time
+import asyncio
+import random
+import numpy as np
 import pandas as pd
+from numba import njit
 from tqdm.auto import tqdm
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from dataclasses import dataclass, field
 
@@ -11,6 +17,9 @@ from pinecone import Pinecone, ServerlessSpec
 import google.generativeai as genai
 
 
+_QUIT = frozenset({'quit', 'exit'})
+
+
 @dataclass
 class Config:
     """Holds all the configuration for the chatbot."""
@@ -26,9 +35,13 @@ class Config:
 
     data_file: str = "books.csv"
     indexed_flag_file: str = "pinecone_index_v3_complete.flag"
+    host_cache_file: str = ".pinecone_host.json"
     
     rows_to_process: int = 100
 
+    cache_similarity_threshold: float = 0.95
+    cache_max_entries: int = 1024
+
     def __post_init__(self):
         """Load environment variables after the object is created."""
         load_dotenv()
@@ -57,13 +70,31 @@ class GeminiService:
         )
         return result['embedding']
 
-    def generate_response(self, prompt: str) -> str:
-        """Generates a text response from a prompt."""
+    async def embed_content_async(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """Generates embeddings for a list of texts without blocking the event loop."""
+        result = await genai.embed_content_async(
+            model=self.embedding_model,
+            content=texts,
+            task_type=task_type
+        )
+        return result['embedding']
+
+    async def generate_response_async(self, prompt: str) -> Optional[str]:
+        """Streams a text response from a prompt to stdout.
+
+        Returns the full text, or None if generation failed (an error message is printed instead).
+        """
+        chunks = []
         try:
-            response = self.generative_model.generate_content(prompt)
-            return response.text
+            response = await self.generative_model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                print(chunk.text, end='', flush=True)
+                chunks.append(chunk.text)
         except Exception as e:
-            return f"Sorry, I encountered an error while generating a response: {e}"
+            print(f"Sorry, I encountered an error while generating a response: {e}")
+            return None
+        print()
+        return ''.join(chunks)
 
 
 class PineconeService:
@@ -72,8 +103,14 @@ class PineconeService:
         self.pc = Pinecone(api_key=api_key)
         print("✅ Pinecone Service Initialized")
 
-    def get_or_create_index(self, name: str, dimension: int) -> Pinecone.Index:
-        """Gets a Pinecone index, creating it if it doesn't exist."""
+    def get_or_create_index(self, name: str, dimension: int, host: Optional[str] = None) -> Pinecone.Index:
+        """Gets a Pinecone index, creating it if it doesn't exist.
+
+        When a cached host is given, the index is targeted directly and the control-plane lookup is skipped.
+        """
+        if host:
+            print(f"Using cached host for index '{name}'.")
+            return self.pc.Index(host=host)
         if name not in self.pc.list_indexes().names():
             print(f"Creating new Pinecone index: {name}...")
             self.pc.create_index(
@@ -87,32 +124,103 @@ class PineconeService:
             print(f"Index '{name}' already exists.")
         return self.pc.Index(name)
 
+    def get_index_host(self, name: str) -> str:
+        """Returns the data-plane host of a Pinecone index."""
+        return self.pc.describe_index(name).host
+
+    def _embed_and_upsert(self, index: Pinecone.Index, batch_df: pd.DataFrame, embed_function: Callable):
+        """Embeds a single batch and upserts it into the Pinecone index."""
+        time.sleep(random.uniform(0, 0.05))
+        texts = batch_df['description_for_embedding'].tolist()
+
+        embeddings = embed_function(texts, "RETRIEVAL_DOCUMENT")
+
+        vectors = [
+            {
+                "id": book_id,
+                "values": embedding,
+                "metadata": {
+                    "title": title,
+                    "authors": authors,
+                    "average_rating": float(rating)
+                }
+            }
+            for book_id, title, authors, rating, embedding in zip(
+                batch_df['bookID'].tolist(),
+                batch_df['title'].tolist(),
+                batch_df['authors'].tolist(),
+                batch_df['average_rating'].tolist(),
+                embeddings,
+                strict=True
+            )
+        ]
+        index.upsert(vectors=vectors)
+
     def upsert_data(self, index: Pinecone.Index, data: pd.DataFrame, embed_function: Callable):
-        """Embeds and upserts data into the Pinecone index in batches."""
+        """Embeds and upserts data into the Pinecone index in concurrent batches."""
         print("Embedding and upserting data to Pinecone...")
-        batch_size = 50
-        for i in tqdm(range(0, len(data), batch_size), desc="Upserting to Pinecone"):
-            batch_df = data.iloc[i:i + batch_size]
-            texts = batch_df['description_for_embedding'].tolist()
-            
-            embeddings = embed_function(texts, "RETRIEVAL_DOCUMENT")
-            
-            vectors = []
-            for idx, row in batch_df.iterrows():
-                vector = {
-                    "id": row['bookID'],
-                    "values": embeddings[len(vectors)],
-                    "metadata": {
-                        "title": row['title'],
-                        "authors": row['authors'],
-                        "average_rating": float(row['average_rating'])
-                    }
-                }
-                vectors.append(vector)
-            index.upsert(vectors=vectors)
+        batch_size = 250
+        max_workers = 8
+        batches = [data.iloc[i:i + batch_size] for i in range(0, len(data), batch_size)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._embed_and_upsert, index, batch_df, embed_function)
+                for batch_df in batches
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Upserting to Pinecone"):
+                future.result()
         print("Upsert complete.")
 
 
+@njit(cache=True, fastmath=True)
+def l2norm_inplace(v: np.ndarray):
+    """L2-normalizes a 1-D vector in place in a single fused pass."""
+    s = 0.0
+    for i in range(v.shape[0]):
+        s += v[i] * v[i]
+    inv = 1.0 / (s ** 0.5 + 1e-12)
+    for i in range(v.shape[0]):
+        v[i] *= inv
+
+
+class SemanticCache:
+    """Caches responses keyed by query embedding, matched by cosine similarity.
+
+    Entries live in a preallocated ring buffer; once full, the oldest entry is overwritten.
+    """
+    def __init__(self, dimension: int, threshold: float, max_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embs = np.zeros((max_entries, dimension), dtype=np.float32)
+        self.responses: List[Optional[str]] = [None] * max_entries
+        self.next_index = 0
+        self.size = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """Returns the embedding as an L2-normalized float32 vector."""
+        v = np.array(embedding, dtype=np.float32)
+        l2norm_inplace(v)
+        return v
+
+    def get(self, embedding: List[float]) -> Optional[str]:
+        """Returns the cached response for the most similar query above the threshold, if any."""
+        if not self.size:
+            return None
+        sims = self.embs[:self.size] @ self._normalize(embedding)
+        best = int(np.argmax(sims))
+        if sims[best] > self.threshold:
+            return self.responses[best]
+        return None
+
+    def add(self, embedding: List[float], response: str):
+        """Stores a response, overwriting the oldest entry once the cache is full."""
+        self.embs[self.next_index] = self._normalize(embedding)
+        self.responses[self.next_index] = response
+        self.next_index = (self.next_index + 1) % self.max_entries
+        self.size = min(self.size + 1, self.max_entries)
+
+
 class BookChatbot:
     """The main chatbot application orchestrator."""
     def __init__(self, config: Config):
@@ -120,7 +228,18 @@ class BookChatbot:
         self.gemini = GeminiService(config.google_api_key, config.embedding_model, config.generative_model)
         self.pinecone = PineconeService(config.pinecone_api_key, config.pinecone_env)
         self.data = self._load_data()
-        self.index = self.pinecone.get_or_create_index(config.pinecone_index_name, config.model_dimension)
+        self.cache = SemanticCache(config.model_dimension, config.cache_similarity_threshold, config.cache_max_entries)
+        self.index = self.pinecone.get_or_create_index(
+            config.pinecone_index_name, config.model_dimension, host=self._load_cached_host()
+        )
+
+    def _load_cached_host(self) -> Optional[str]:
+        """Reads the index host cached by a previous run, if any."""
+        try:
+            with open(self.config.host_cache_file) as f:
+                return json.load(f).get("host")
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            return None
 
     def _load_data(self) -> pd.DataFrame:
         """Loads and prepares the book data from the CSV file."""
@@ -133,7 +252,7 @@ class BookChatbot:
             
         df.dropna(subset=['bookID', 'title', 'authors'], inplace=True)
         df = df.head(self.config.rows_to_process)
-        df['description_for_embedding'] = "Title: " + df['title'] + "; Authors: " + df['authors']
+        df['description_for_embedding'] = df['title'].str.cat(df['authors'], sep='; Authors: ').radd('Title: ')
         df['bookID'] = df['bookID'].astype(str)
         
         print(f"Data loaded. Processing {len(df)} books.")
@@ -160,43 +279,67 @@ class BookChatbot:
             print("Setup complete.")
         else:
             print("Data already indexed. Ready to chat.")
+        if self._load_cached_host() is None:
+            self._write_cached_host()
 
-    def run(self):
-        """Starts the main interactive chat loop."""
-        print("\n--- Book Recommender Chatbot ---")
-        print("Ask me for book recommendations! Type 'quit' or 'exit' to stop.")
+    def _write_cached_host(self):
+        """Caches the index host so later runs can skip the control-plane lookup."""
+        host = self.pinecone.get_index_host(self.config.pinecone_index_name)
+        with open(self.config.host_cache_file, "w") as f:
+            json.dump({"host": host}, f)
 
-        while True:
-            user_query = input("\nYou: ")
-            if user_query.lower() in ['quit', 'exit']:
-                print("Bot: Goodbye!")
-                break
+    async def _answer(self, user_query: str):
+        """Retrieves relevant books for a query and streams the recommendation."""
+        query_embedding = (await self.gemini.embed_content_async([user_query], "RETRIEVAL_QUERY"))[0]
 
-            query_embedding = self.gemini.embed_content([user_query], "RETRIEVAL_QUERY")[0]
+        cached_response = self.cache.get(query_embedding)
+        if cached_response is not None:
+            print(f"Bot: {cached_response}")
+            return
 
-            matches = self.index.query(vector=query_embedding, top_k=5, include_metadata=True)['matches']
+        matches = self.index.query(vector=query_embedding, top_k=5, include_metadata=True)['matches']
 
-            if not matches:
-                print("Bot: I'm sorry, I couldn't find any relevant books. Please try a different query.")
-                continue
+        if not matches:
+            print("Bot: I'm sorry, I couldn't find any relevant books. Please try a different query.")
+            return
 
-            context = self._format_context(matches)
-            
-            prompt = (
-                f"**Context - Relevant Books:**\n{context}\n\n"
-                f"**User's Request:** \"{user_query}\"\n\n"
-                "**Your Task:**\n"
-                "You are a friendly and helpful bookstore assistant. Based *only* on the book results provided in the context, give a conversational recommendation to the user.\n\n"
-                "**Formatting Rules:**\n"
-                "1. Start with a friendly, one-sentence introduction.\n"
-                "2. Present the recommended books as a bulleted list (using '*' or '-').\n"
-                "3. For each book in the list, make the title **bold**.\n"
-                "4. After the title, briefly explain (in 1-2 sentences) why it fits the user's request.\n"
-                "5. Do not invent books or suggest any that are not in the context."
-            )
-            
-            response = self.gemini.generate_response(prompt)
-            print(f"Bot: {response}")
+        context = self._format_context(matches)
+        
+        prompt = (
+            f"**Context - Relevant Books:**\n{context}\n\n"
+            f"**User's Request:** \"{user_query}\"\n\n"
+            "**Your Task:**\n"
+            "You are a friendly and helpful bookstore assistant. Based *only* on the book results provided in the context, give a conversational recommendation to the user.\n\n"
+            "**Formatting Rules:**\n"
+            "1. Start with a friendly, one-sentence introduction.\n"
+            "2. Present the recommended books as a bulleted list (using '*' or '-').\n"
+            "3. For each book in the list, make the title **bold**.\n"
+            "4. After the title, briefly explain (in 1-2 sentences) why it fits the user's request.\n"
+            "5. Do not invent books or suggest any that are not in the context."
+        )
+        
+        print("Bot: ", end='', flush=True)
+        response = await self.gemini.generate_response_async(prompt)
+        if response is not None:
+            self.cache.add(query_embedding, response)
+
+    def run(self):
+        """Starts the main interactive chat loop."""
+        print("\n--- Book Recommender Chatbot ---")
+        print("Ask me for book recommendations! Type 'quit' or 'exit' (or press Ctrl+C / Ctrl+D) to stop.")
+
+        # input() stays on the main thread so Ctrl+C and Ctrl+D interrupt it directly
+        with asyncio.Runner() as runner:
+            while True:
+                try:
+                    user_query = input("\nYou: ")
+                    if user_query.lower() in _QUIT:
+                        print("Bot: Goodbye!")
+                        break
+                    runner.run(self._answer(user_query))
+                except (KeyboardInterrupt, EOFError):
+                    print("\nBot: Goodbye!")
+                    break
 
 
 if __name__ == '__main__':
@@ -1,16 +1,21 @@
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import OrdinalEncoder
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import mean_absolute_error
+from sklearn.inspection import permutation_importance
 import joblib
 
+# Command-line options
+parser = argparse.ArgumentParser(description="Train and evaluate the delivery time model.")
+parser.add_argument("--plot", action="store_true", help="Show feature importance, pairplot and heatmap charts")
+args = parser.parse_args()
+
 # Load data
 df = pd.read_csv("Food_Delivery_Times.csv")
 df = df.dropna()
@@ -26,7 +31,7 @@ num_features = ["Distance_km", "Preparation_Time_min", "Courier_Experience_yrs"]
 # Preprocessing
 cat_transformer = Pipeline([
     ("imputer", SimpleImputer(strategy="most_frequent")),
-    ("encoder", OneHotEncoder(handle_unknown="ignore"))
+    ("encoder", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=np.nan))
 ])
 
 num_transformer = Pipeline([
@@ -38,10 +43,12 @@ preprocessor = ColumnTransformer([
     ("num", num_transformer, num_features)
 ])
 
-# Pipeline
+# Pipeline (the preprocessor outputs the categorical columns first)
 model = Pipeline([
     ("preprocessor", preprocessor),
-    ("regressor", RandomForestRegressor(n_estimators=100, random_state=42))
+    ("regressor", HistGradientBoostingRegressor(
+        max_iter=200, max_bins=255, categorical_features=list(range(len(cat_features))), random_state=42
+    ))
 ])
 
 # Train-test split
@@ -55,24 +62,13 @@ y_pred = model.predict(X_test)
 mae = mean_absolute_error(y_test, y_pred)
 print(f"Mean Absolute Error: {mae:.2f} minutes")
 
-# Save the model
-joblib.dump(model, "delivery_time_model.pkl")
-
-# Visualization: Feature Importance
-model_rf = model.named_steps["regressor"]
-encoded_features = model.named_steps["preprocessor"].transformers_[0][1].named_steps["encoder"].get_feature_names_out(cat_features)
-all_features = np.concatenate([encoded_features, num_features])
-
-importances = model_rf.feature_importances_
-indices = np.argsort(importances)[-10:]
-
-plt.figure(figsize=(10,6))
-sns.barplot(x=importances[indices], y=all_features[indices])
-plt.title("Top Feature Importances")
-plt.tight_layout()
-plt.savefig("feature_importance.png")
-plt.show()
-
+# Save the model (LZ4 when the optional lz4 package is installed, zlib otherwise)
+try:
+    import lz4  # noqa: F401
+    model_compression = ("lz4", 3)
+except ImportError:
+    model_compression = 3
+joblib.dump(model, "delivery_time_model.pkl", compress=model_compression, protocol=5)
 
 
 from sklearn.metrics import r2_score
@@ -96,13 +92,35 @@ input_df = pd.DataFrame([sample_input])
 predicted_time = model.predict(input_df)[0]
 print(f"Predicted Delivery Time for custom input: {predicted_time:.2f} minutes")
 
-# Pairplot of key numerical features
-sns.pairplot(df[["Distance_km", "Preparation_Time_min", "Courier_Experience_yrs", "Delivery_Time_min"]])
-plt.suptitle("Pairplot of Key Numerical Features", y=1.02)
-plt.show()
-
-# Correlation heatmap
-plt.figure(figsize=(8,6))
-sns.heatmap(df.corr(numeric_only=True), annot=True, cmap="coolwarm", fmt=".2f")
-plt.title("Correlation Heatmap")
-plt.show()
+if args.plot:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Feature importance (permutation-based, HGB has no impurity importances)
+    importance_result = permutation_importance(model, X_test, y_test, n_repeats=10, random_state=42, n_jobs=-1)
+    all_features = np.array(X_test.columns)
+
+    importances = importance_result.importances_mean
+    indices = np.argsort(importances)[-10:]
+
+    plt.figure(figsize=(10,6))
+    sns.barplot(x=importances[indices], y=all_features[indices])
+    plt.title("Top Feature Importances")
+    plt.tight_layout()
+    plt.savefig("feature_importance.png")
+    plt.show()
+
+    # Pairplot of key numerical features
+    sns.pairplot(
+        df[["Distance_km", "Preparation_Time_min", "Courier_Experience_yrs", "Delivery_Time_min"]],
+        diag_kind="hist",
+        plot_kws={"s": 5, "alpha": 0.3}
+    )
+    plt.suptitle("Pairplot of Key Numerical Features", y=1.02)
+    plt.show()
+
+    # Correlation heatmap
+    plt.figure(figsize=(8,6))
+    sns.heatmap(df.corr(numeric_only=True), annot=True, cmap="coolwarm", fmt=".2f")
+    plt.title("Correlation Heatmap")
+    plt.show()
@@ -1,5 +1,7 @@
 import os
+import sys
 import json
+import orjson
 import google.generativeai as genai
 from dotenv import load_dotenv
 import textwrap
@@ -67,6 +69,7 @@ RULES:
 - **CRITICAL PRICING RULE:** When the entire order is complete, you MUST add an `item_prices` object and a `total_price` string to the `order_details`. `item_prices` should map the full item name to its calculated price. `total_price` is the sum of all values in `item_prices`. Prices must be numbers.
 - IMPORTANT: When you believe the entire order is complete, you MUST set the "status" field to "complete".
 - ALWAYS respond with a JSON object with three keys: "status", "response", and "order_details".
+- If a message starts with `__NEW_ORDER__`, the previous order is finished: forget its items, reset `order_details` to an empty object, and start over with your first question.
 
 Example (Complete order with pricing):
 {
@@ -90,18 +93,28 @@ Example (Complete order with pricing):
 }
 """
 
+NEW_ORDER_MESSAGE = "__NEW_ORDER__ Start a fresh order from scratch."
+
+_QUIT = frozenset({'quit', 'exit', 'bye'})
+_YES = frozenset({'yes', 'y', 'sure', 'ok', 'yeah'})
+
+_WRAPPER = textwrap.TextWrapper(width=54, drop_whitespace=False, replace_whitespace=False)
+
 def print_bot_message(message, width=60):
     """Prints the bot's message inside a styled box."""
     lines = message.replace('\\n', '\n').split('\n')
+    if _WRAPPER.width != width - 6:
+        _WRAPPER.width = width - 6
     print(f"╭{'─' * (width-2)}╮")
-    print(f"│ 🤖 {'Zalo\'s Pizzeria'.ljust(width - 6)} │")
+    title = "Zalo's Pizzeria"
+    print(f"│ 🤖 {title:<{width - 6}} │")
     print(f"├{'─' * (width-2)}┤")
     for line in lines:
-        wrapped_lines = textwrap.wrap(line, width - 6, drop_whitespace=False, replace_whitespace=False)
+        wrapped_lines = _WRAPPER.wrap(line)
         if not wrapped_lines:
             print(f"│ {' ' * (width - 4)} │")
         for wrapped_line in wrapped_lines:
-            print(f"│   {wrapped_line.ljust(width - 7)} │")
+            print(f"│   {wrapped_line:<{width - 7}} │")
     print(f"╰{'─' * (width-2)}╯")
 
 def get_user_input():
@@ -115,28 +128,29 @@ def display_final_order(order_details):
     top_border = f"╭{'─' * (width-2)}╮"
     bottom_border = f"╰{'─' * (width-2)}╯"
     separator = f"├{'─' * (width-2)}┤"
+    empty_line = f"│ {' ' * (width - 4)} │"
+    out = []
 
-    def print_line(text, centered=False):
+    def add_line(text, centered=False):
         if centered:
-            content = text.center(width - 4)
-            print(f"│ {content} │")
+            out.append(f"│ {text:^{width - 4}} │")
         else:
-            print(f"│ {text.ljust(width - 4)} │")
+            out.append(f"│ {text:<{width - 4}} │")
 
-    def print_empty_line():
-        print(f"│ {' ' * (width - 4)} │")
+    def add_empty_line():
+        out.append(empty_line)
 
-    print("\n\n" + top_border)
-    print_line("🍕 Zalo's Pizzeria 🍕", centered=True)
-    print_line("~ Your Final Order ~", centered=True)
-    print(separator)
-    print_empty_line()
+    out.append("\n\n" + top_border)
+    add_line("🍕 Zalo's Pizzeria 🍕", centered=True)
+    add_line("~ Your Final Order ~", centered=True)
+    out.append(separator)
+    add_empty_line()
 
     # --- Item Details ---
     if 'pizza_name' in order_details:
-        print_line(f"  PIZZA: {order_details['pizza_name']}")
-    print_line(f"  • Size: {order_details.get('size', 'N/A')}")
-    print_line(f"  • Crust: {order_details.get('crust', 'N/A')}")
+        add_line(f"  PIZZA: {order_details['pizza_name']}")
+    add_line(f"  • Size: {order_details.get('size', 'N/A')}")
+    add_line(f"  • Crust: {order_details.get('crust', 'N/A')}")
     
     if order_details.get('toppings'):
         label = "  • Toppings: "
@@ -148,62 +162,69 @@ def display_final_order(order_details):
             subsequent_indent=' ' * len(label)
         )
         for line in wrapped_lines:
-            print_line(line)
+            add_line(line)
 
     if order_details.get('sides'):
-        print_empty_line()
-        print_line(f"  SIDES: {', '.join(order_details['sides'])}")
+        add_empty_line()
+        add_line(f"  SIDES: {', '.join(order_details['sides'])}")
     if order_details.get('drinks'):
-        print_empty_line()
-        print_line(f"  DRINKS: {', '.join(order_details['drinks'])}")
+        add_empty_line()
+        add_line(f"  DRINKS: {', '.join(order_details['drinks'])}")
 
     if 'item_prices' in order_details and 'total_price' in order_details:
-        print_empty_line()
-        print(separator)
-        print_line("Price Breakdown", centered=True)
-        print_empty_line()
+        add_empty_line()
+        out.append(separator)
+        add_line("Price Breakdown", centered=True)
+        add_empty_line()
 
         for item, price in order_details['item_prices'].items():
             price_str = f"${float(price):.2f}"
             dots = '.' * (width - 8 - len(item) - len(price_str))
-            print_line(f"  {item} {dots} {price_str}")
+            add_line(f"  {item} {dots} {price_str}")
 
-        print_empty_line()
+        add_empty_line()
         total_price_str = f"${float(order_details['total_price']):.2f}"
         total_label = "TOTAL"
         dots = '.' * (width - 8 - len(total_label) - len(total_price_str))
-        print_line(f"  {total_label} {dots} {total_price_str}")
-
-    print_empty_line()
-    print(bottom_border)
-    print("      Thank you for your order! Enjoy your meal! 🎉\n")
+        add_line(f"  {total_label} {dots} {total_price_str}")
 
+    add_empty_line()
+    out.append(bottom_border)
+    out.append("      Thank you for your order! Enjoy your meal! 🎉\n")
+    sys.stdout.write('\n'.join(out) + '\n')
 
 def main():
     """The main function to run the chatbot."""
     print_bot_message("Welcome! I can help you place an order.\nType 'quit' or 'exit' anytime to end the chat.")
 
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    # The system prompt is a static instruction prefix rather than a chat turn, so it can be reused across turns
+    model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=SYSTEM_PROMPT)
 
-    initial_model_response = json.dumps({
+    initial_model_data = {
         "status": "in_progress",
         "response": "Hello! Welcome to Zalo's Pizzeria. Would you like to try one of our delicious specialty pizzas, or would you prefer to build your own?",
         "order_details": {}
-    })
+    }
+    initial_model_response = json.dumps(initial_model_data)
 
     chat = model.start_chat(history=[
-        {'role': 'user', 'parts': [SYSTEM_PROMPT]},
+        {'role': 'user', 'parts': ["Hi!"]},
         {'role': 'model', 'parts': [initial_model_response]}
     ])
 
-    initial_greeting = json.loads(initial_model_response)["response"]
+    initial_greeting = initial_model_data["response"]
     print_bot_message(initial_greeting)
 
+    next_message = None
+
     while True:
-        user_input = get_user_input()
+        if next_message:
+            user_input, next_message = next_message, None
+        else:
+            user_input = get_user_input()
 
-        if user_input.lower() in ['quit', 'exit', 'bye']:
-            break
+            if user_input.lower() in _QUIT:
+                break
 
         try:
             response = chat.send_message(user_input)
@@ -213,7 +234,7 @@ def main():
                 if ai_response_text.strip().startswith("```json"):
                     ai_response_text = ai_response_text.strip()[7:-3].strip()
 
-                ai_data = json.loads(ai_response_text)
+                ai_data = orjson.loads(ai_response_text)
                 bot_message = ai_data.get("response", "I'm not sure how to respond to that.")
                 status = ai_data.get("status", "in_progress")
                 order_details = ai_data.get("order_details", {})
@@ -226,13 +247,10 @@ def main():
                     print_bot_message("Would you like to place another order? (yes/no)")
                     another = get_user_input()
 
-                    if another.lower().strip() in ['yes', 'y', 'sure', 'ok', 'yeah']:
+                    if another.lower().strip() in _YES:
                         print_bot_message("Great! Let's start a new order.")
-                        chat = model.start_chat(history=[
-                            {'role': 'user', 'parts': [SYSTEM_PROMPT]},
-                            {'role': 'model', 'parts': [initial_model_response]}
-                        ])
-                        print_bot_message(initial_greeting)
+                        # Reuse the same chat so the system prompt prefix is not prefilled again
+                        next_message = NEW_ORDER_MESSAGE
                     else:
                         break
 
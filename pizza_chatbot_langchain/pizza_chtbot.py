@@ -1,12 +1,11 @@
 
 import os
 import json
+from collections import deque
 from dotenv import load_dotenv
 
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.chat_message_histories import ChatMessageHistory 
-from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
 from rich.console import Console
 from rich.panel import Panel
@@ -17,13 +16,38 @@ from rich.prompt import Prompt
 
 console = Console()
 store = {}
+_QUIT = frozenset({"quit", "exit"})
+MAX_HISTORY_TURNS = 20
+
+SYSTEM_PROMPT = """You are a friendly and helpful ordering chatbot for a pizzeria named "Zalo".
+        Your goal is to take a customer's order for pizza and drinks.
+        
+        Follow these steps precisely:
+        1. Greet the user and ask what they would like to order.
+        2. Ask for the pizza size (Small, Medium, Large).
+        3. Ask for the crust type (Thin, Thick, Stuffed).
+        4. Ask for toppings. The user can list multiple toppings.
+        5. After getting pizza details, ask if they want any drinks (Coke, Pepsi, Water).
+        6. After getting all details, confirm the complete order (pizza and drinks) with the user.
+        7. Once the user confirms the order is correct, you MUST present the final order
+           in a structured JSON format within a special block. THIS IS VERY IMPORTANT.
+           The format MUST be:
+           
+           <ORDER>
+           {
+             "size": "...",
+             "crust": "...",
+             "toppings": ["...", "..."],
+             "drinks": ["...", "..."]
+           }
+           </ORDER>"""
 
 def setup_environment():
     """Loads environment variables and returns the Gemini API key.
     
     Make sure you have a .env file with GOOGLE_API_KEY="your_api_key"
     Also, ensure you have the required packages:
-    pip install langchain langchain-google-genai langchain-community python-dotenv rich
+    pip install langchain langchain-google-genai python-dotenv rich
     """
     load_dotenv()
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -32,10 +56,10 @@ def setup_environment():
         exit()
     return api_key
 
-def get_session_history(session_id: str) -> ChatMessageHistory:
-    """Gets the chat history for a given session ID."""
+def get_session_history(session_id: str) -> deque:
+    """Gets the (human, ai) message pairs kept for a given session ID."""
     if session_id not in store:
-        store[session_id] = ChatMessageHistory()
+        store[session_id] = deque(maxlen=MAX_HISTORY_TURNS)
     return store[session_id]
 
 
@@ -92,55 +116,29 @@ def display_final_order(order_details):
     console.print(order_panel)
 
 
-def create_chatbot_chain(api_key):
-    """Configures and returns a modern, runnable LangChain chain."""
-    
+def create_chatbot_llm(api_key):
+    """Configures and returns the Gemini chat model."""
+    return ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=api_key, temperature=0.7)
 
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", google_api_key=api_key, temperature=0.7)
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a friendly and helpful ordering chatbot for a pizzeria named "Zalo".
-        Your goal is to take a customer's order for pizza and drinks.
-        
-        Follow these steps precisely:
-        1. Greet the user and ask what they would like to order.
-        2. Ask for the pizza size (Small, Medium, Large).
-        3. Ask for the crust type (Thin, Thick, Stuffed).
-        4. Ask for toppings. The user can list multiple toppings.
-        5. After getting pizza details, ask if they want any drinks (Coke, Pepsi, Water).
-        6. After getting all details, confirm the complete order (pizza and drinks) with the user.
-        7. Once the user confirms the order is correct, you MUST present the final order
-           in a structured JSON format within a special block. THIS IS VERY IMPORTANT.
-           The format MUST be:
-           
-           <ORDER>
-           {{
-             "size": "...",
-             "crust": "...",
-             "toppings": ["...", "..."],
-             "drinks": ["...", "..."]
-           }}
-           </ORDER>"""),
-        MessagesPlaceholder(variable_name="chat_history"),
-        ("human", "{input}"),
-    ])
-    
-    runnable = prompt | llm
-    
-    chain_with_history = RunnableWithMessageHistory(
-        runnable,
-        get_session_history,
-        input_messages_key="input",
-        history_messages_key="chat_history",
-    )
-    
-    return chain_with_history
+
+def send_message(llm, session_id: str, user_input: str):
+    """Sends the user's input with the system prompt and the trimmed session history."""
+    history = get_session_history(session_id)
+    messages = [SystemMessage(content=SYSTEM_PROMPT)]
+    for human, ai in history:
+        messages.append(HumanMessage(content=human))
+        messages.append(AIMessage(content=ai))
+    messages.append(HumanMessage(content=user_input))
+
+    response = llm.invoke(messages)
+    history.append((user_input, response.content))
+    return response
 
 
 def start_chat():
     """The main function to run the chatbot application."""
     api_key = setup_environment()
-    chatbot_chain = create_chatbot_chain(api_key)
+    llm = create_chatbot_llm(api_key)
     
     display_welcome_message()
     display_menu()
@@ -151,12 +149,11 @@ def start_chat():
         try:
             user_input = Prompt.ask("[bold green]You[/bold green]")
             
-            if user_input.lower() in ["quit", "exit"]:
+            if user_input.lower() in _QUIT:
                 console.print("[bold magenta]Thank you for visiting Zalo. Goodbye![/bold magenta]")
                 break
             
-            config = {"configurable": {"session_id": "main_session"}}
-            response = chatbot_chain.invoke({"input": user_input}, config=config)
+            response = send_message(llm, "main_session", user_input)
             bot_response = response.content
 
             if "<ORDER>" in bot_response and "</ORDER>" in bot_response: